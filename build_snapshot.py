@@ -0,0 +1,33 @@
+import argparse
+import logging
+from pathlib import Path
+
+import streamlit  # noqa: F401
+
+# Streamlit 런타임 밖에서 캐시 데코레이터가 남기는 경고는 CLI 에서 숨김
+logging.getLogger("streamlit.runtime.caching.cache_data_api").setLevel(logging.ERROR)
+
+from data_loader import SNAPSHOT_PATH, build_snapshot  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="data 폴더의 CSV / XLSX 를 대시보드용 스냅샷 파일 하나로 컴파일"
+    )
+    parser.add_argument("--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--output", type=Path, default=SNAPSHOT_PATH)
+    args = parser.parse_args(argv)
+
+    if not args.data_dir.exists():
+        parser.error(f"{args.data_dir} 폴더가 존재하지 않습니다.")
+
+    try:
+        manifest = build_snapshot(args.data_dir, args.output)
+    except ValueError as e:
+        parser.exit(1, f"❌ {e}\n")
+
+    print(f"✅ {args.output} ({len(manifest['schools'])}개 학교, {manifest['created']})")
+
+
+if __name__ == "__main__":
+    main()
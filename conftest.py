@@ -0,0 +1 @@
+# 저장소 루트의 conftest: pytest 가 이 디렉터리를 sys.path 에 넣어 tests/ 에서 data_loader 를 바로 import
@@ -0,0 +1,1317 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import openpyxl
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import unicodedata
+import os
+import hashlib
+import json
+import sqlite3
+import io
+import threading
+import itertools
+
+# ==================================================
+# 유틸: NFC/NFD 완전 대응
+# ==================================================
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text)
+
+# ==================================================
+# 환경 데이터 컬럼형 캐시 (Parquet)
+# ==================================================
+CACHE_DIR = Path(".cache")
+# 파싱 방식이 바뀌면 올려서 기존 캐시를 무효화
+ENV_CACHE_VERSION = 8
+# 이전 파싱 위치 앞부분이 그대로인지 확인할 때 보는 바이트 수
+TAIL_CHECK_BYTES = 4096
+# 증분 조각이 이만큼 쌓이면 하나의 Parquet 로 합침
+ENV_CACHE_MAX_PARTS = 16
+
+# 프로세스 안에서 파일별 최신 프레임 보관 (증분 추가 시 재사용)
+_env_frames: dict[str, pd.DataFrame] = {}
+# 파일별 다해상도 구간 집계 {"rows": 반영된 줄 수, "levels": {간격: 구간 집계}}
+_env_pyramids: dict[str, dict] = {}
+# 파일별 잠금: 여러 세션이 같은 파일의 증분 추가를 동시에 하지 않도록
+_env_locks: dict[str, threading.Lock] = {}
+_env_locks_guard = threading.Lock()
+
+
+def _env_lock(key: str) -> threading.Lock:
+    with _env_locks_guard:
+        return _env_locks.setdefault(key, threading.Lock())
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _read_cache_meta(meta_file: Path) -> dict:
+    try:
+        return json.loads(meta_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache_meta(meta_file: Path, meta: dict):
+    meta_file.write_text(json.dumps(meta), encoding="utf-8")
+
+
+# ==================================================
+# 시간 컬럼 포맷 추정
+# ==================================================
+# 학교마다 기록 포맷이 다름 (예: 2025-05-01 5:00:00, 2025.05.26 13:00:00, 2025.5.30 0:00)
+TIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y.%m.%d %H:%M:%S",
+    "%Y.%m.%d %H:%M",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+)
+TIME_SNIFF_ROWS = 20
+
+# 파일별로 한 번 추정한 포맷을 기억
+_time_format_cache: dict[str, str] = {}
+
+
+def sniff_time_format(values: pd.Series, preferred: str | None = None) -> str | None:
+    sample = values.dropna().head(TIME_SNIFF_ROWS)
+    if sample.empty:
+        return None
+
+    formats = TIME_FORMATS if preferred is None else (preferred, *TIME_FORMATS)
+    for fmt in formats:
+        try:
+            pd.to_datetime(sample, format=fmt)
+        except (ValueError, TypeError):
+            continue
+        return fmt
+
+    return None
+
+
+def parse_time_column(values: pd.Series, key: str) -> pd.Series:
+    # ISO 형식은 pyarrow 가 읽으면서 이미 변환함
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    # 앞부분 몇 행으로 포맷을 정한 뒤 컬럼 전체를 한 번에 변환
+    fmt = sniff_time_format(values, preferred=_time_format_cache.get(key))
+    if fmt is not None:
+        try:
+            parsed = pd.to_datetime(values, format=fmt)
+        except (ValueError, TypeError):
+            # 파일 중간에 포맷이 섞여 있는 경우
+            _time_format_cache.pop(key, None)
+        else:
+            _time_format_cache[key] = fmt
+            return parsed
+
+    # 단일 포맷으로 읽을 수 없으면 요소별 추정 (느린 경로)
+    return pd.to_datetime(values, format="mixed")
+
+
+# ==================================================
+# 환경 데이터 스키마
+# ==================================================
+SENSOR_COLUMNS = ["temperature", "humidity", "ph", "ec"]
+ENV_COLUMNS = ["time"] + SENSOR_COLUMNS
+# 센서 값은 float32 로 충분 (메모리 절반)
+ENV_DTYPES = {c: "float32" for c in SENSOR_COLUMNS}
+
+
+def last_line_start(path: Path, size: int) -> int:
+    # 마지막 줄은 기록 중일 수 있으므로 다음 증분 파싱 때 다시 읽음
+    block = min(size, 1 << 16)
+    with open(path, "rb") as fp:
+        fp.seek(size - block)
+        tail = fp.read(block).rstrip(b"\r\n")
+    pos = tail.rfind(b"\n")
+    if pos < 0:
+        return 0
+    return size - block + pos + 1
+
+
+def tail_digest(path: Path, offset: int) -> str:
+    start = max(0, offset - TAIL_CHECK_BYTES)
+    with open(path, "rb") as fp:
+        fp.seek(start)
+        return hashlib.sha1(fp.read(offset - start)).hexdigest()
+
+
+def _parse_environment_source(source, key: str) -> pd.DataFrame:
+    # pyarrow 엔진: 멀티스레드 토크나이저, "21.170 " 같은 후행 공백도 바로 숫자로 변환
+    df = pd.read_csv(
+        source,
+        engine="pyarrow",
+        usecols=ENV_COLUMNS,
+        dtype=ENV_DTYPES,
+    )
+    # 파일마다 컬럼 순서가 달라도 동일한 순서로 맞춤
+    df = df[ENV_COLUMNS]
+    # 파일마다 해상도(s/ms/us)가 달라지지 않도록 단위를 고정
+    df["time"] = parse_time_column(df["time"], key).astype("datetime64[us]")
+    return df
+
+
+def parse_environment_csv(path: Path, offset: int = 0, end: int | None = None) -> pd.DataFrame:
+    # [offset, end) 바이트 구간만 파싱 (offset 이 있으면 헤더를 앞에 붙임, end 가 없으면 파일 끝까지)
+    key = str(path.resolve())
+    if not offset and end is None:
+        source = path
+    else:
+        with open(path, "rb") as fp:
+            header = fp.readline() if offset else b""
+            fp.seek(offset)
+            rows = fp.read() if end is None else fp.read(max(0, end - offset))
+        source = header + rows
+
+    try:
+        return _parse_environment_source(io.BytesIO(source) if isinstance(source, bytes) else source, key)
+    except ValueError:
+        # 기록 중이라 줄바꿈 없이 끊긴 마지막 줄은 빼고 다시 읽음 (다음 증분 때 다시 읽힘)
+        if not isinstance(source, bytes):
+            with open(path, "rb") as fp:
+                source = fp.read()
+        cut = source.rfind(b"\n")
+        if source.endswith(b"\n") or cut < 0:
+            raise
+        return _parse_environment_source(io.BytesIO(source[:cut + 1]), key)
+
+
+# ==================================================
+# 환경 데이터 요약 (학교별 개수 / 합 / 최소 / 최대)
+# ==================================================
+# 시간 가중 평균: 이보다 긴 측정 공백은 적분하지 않음 (빈 구간을 직선으로 메우지 않도록)
+TW_MAX_GAP_SECONDS = pd.Timedelta(os.environ.get("ENV_TW_MAX_GAP", "6h")).total_seconds()
+
+
+def _time_seconds(times: pd.Series) -> np.ndarray:
+    # NaT 는 NaN 으로
+    seconds = times.to_numpy("datetime64[us]").astype("int64") / 1e6
+    seconds[times.isna().to_numpy()] = np.nan
+    return seconds
+
+
+def trapezoid_integral(seconds: np.ndarray, values: np.ndarray) -> tuple[float, float]:
+    # 사다리꼴 적분 (값 x 초, 적분한 초)
+    dt = np.diff(seconds)
+    ok = (dt > 0) & (dt <= TW_MAX_GAP_SECONDS)
+    area = ((values[1:] + values[:-1]) / 2 * dt)[ok].sum()
+    return float(area), float(dt[ok].sum())
+
+
+def summarize_frame(df: pd.DataFrame) -> dict:
+    # m2: 평균과의 편차 제곱합 (분산 계산용, 청크끼리 합칠 수 있음)
+    # area / span: 시간 가중 평균용 적분, first / last: 청크 경계를 이어 붙이기 위한 끝점 [초, 값]
+    summary = {"rows": len(df)}
+    seconds = _time_seconds(df["time"])
+    for c in SENSOR_COLUMNS:
+        values = df[c].astype("float64")
+        count = int(values.count())
+        total = float(values.sum())
+
+        valid = values.notna().to_numpy() & ~np.isnan(seconds)
+        t, v = seconds[valid], values.to_numpy()[valid]
+        if len(t) > 1 and (np.diff(t) < 0).any():
+            order = np.argsort(t, kind="stable")
+            t, v = t[order], v[order]
+        area, span = trapezoid_integral(t, v)
+
+        summary[c] = {
+            "count": count,
+            "sum": total,
+            "m2": float(((values - total / count) ** 2).sum()) if count else 0.0,
+            "min": float(values.min()) if count else None,
+            "max": float(values.max()) if count else None,
+            "area": area,
+            "span": span,
+            "first": [float(t[0]), float(v[0])] if len(t) else None,
+            "last": [float(t[-1]), float(v[-1])] if len(t) else None,
+        }
+    return summary
+
+
+def merge_summary(a: dict, b: dict) -> dict:
+    # 증분 추가 / 청크 집계 시 기존 요약에 새 줄의 요약만 합침 (m2 는 Chan 의 병렬 분산 공식)
+    merged = {"rows": a["rows"] + b["rows"]}
+    for c in SENSOR_COLUMNS:
+        x, y = a[c], b[c]
+        if not x["count"] or not y["count"]:
+            merged[c] = dict(y if not x["count"] else x)
+            continue
+        count = x["count"] + y["count"]
+        delta = y["sum"] / y["count"] - x["sum"] / x["count"]
+        merged[c] = {
+            "count": count,
+            "sum": x["sum"] + y["sum"],
+            "m2": x["m2"] + y["m2"] + delta ** 2 * x["count"] * y["count"] / count,
+            "min": min(x["min"], y["min"]),
+            "max": max(x["max"], y["max"]),
+        }
+        # b 는 a 뒤에 이어지는 줄이므로 a 의 마지막 점과 b 의 첫 점 사이 구간을 더함
+        edge_area, edge_span = 0.0, 0.0
+        if x["last"] and y["first"]:
+            edge_area, edge_span = trapezoid_integral(
+                np.array([x["last"][0], y["first"][0]]),
+                np.array([x["last"][1], y["first"][1]]),
+            )
+        merged[c].update(
+            area=x["area"] + y["area"] + edge_area,
+            span=x["span"] + y["span"] + edge_span,
+            first=x["first"] or y["first"],
+            last=y["last"] or x["last"],
+        )
+    return merged
+
+
+def summary_table(summaries: dict[str, dict]) -> pd.DataFrame:
+    # 학교 x (센서 컬럼, 통계) 표. mean / std / sem 은 count / sum / m2, twmean 은 area / span 으로 계산
+    rows = {}
+    for school, summary in summaries.items():
+        row = {}
+        for c in SENSOR_COLUMNS:
+            stats = summary[c]
+            n = stats["count"]
+            row.update({(c, k): stats[k] for k in ("count", "sum", "min", "max")})
+            row[(c, "mean")] = stats["sum"] / n if n else float("nan")
+            row[(c, "std")] = (stats["m2"] / (n - 1)) ** 0.5 if n > 1 else float("nan")
+            row[(c, "sem")] = row[(c, "std")] / n ** 0.5 if n > 1 else float("nan")
+            # 시간 가중 평균 (적분 구간이 없으면 단순 평균)
+            row[(c, "span")] = stats["span"]
+            row[(c, "twmean")] = stats["area"] / stats["span"] if stats["span"] else row[(c, "mean")]
+        rows[school] = row
+
+    if not rows:
+        return pd.DataFrame()
+
+    table = pd.DataFrame.from_dict(rows, orient="index").sort_index()
+    table.columns = pd.MultiIndex.from_tuples(table.columns)
+    return table.astype("float64")
+
+
+def _cache_key(path: Path) -> str:
+    return hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_part_files(cache_dir: Path, key: str, parts: int) -> list[Path]:
+    return [cache_dir / f"{key}.parquet"] + [
+        cache_dir / f"{key}.{i}.parquet" for i in range(1, parts + 1)
+    ]
+
+
+def _load_cached_frame(key: str, files: list[Path]) -> pd.DataFrame | None:
+    df = _env_frames.get(key)
+    if df is None:
+        try:
+            df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+        except (OSError, ValueError):
+            return None
+        _env_frames[key] = df
+    return df
+
+
+def _store_frame(
+    path: Path,
+    stat: os.stat_result,
+    df: pd.DataFrame,
+    cache_dir: Path,
+    key: str,
+    meta: dict,
+    new_rows: pd.DataFrame | None = None,
+):
+    # new_rows 가 있으면 증분 조각만 추가로 기록, 없으면 전체를 다시 기록
+    parts = meta.get("parts", 0)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        if new_rows is None or parts >= ENV_CACHE_MAX_PARTS:
+            for f in cache_dir.glob(f"{key}.*.parquet"):
+                f.unlink()
+            parts = 0
+            df.to_parquet(cache_dir / f"{key}.parquet", index=False)
+        elif not new_rows.empty:
+            parts += 1
+            new_rows.to_parquet(cache_dir / f"{key}.{parts}.parquet", index=False)
+
+        # 파싱 전에 잰 크기 기준으로 위치를 기록 (그 사이 추가된 줄은 다음에 다시 읽음)
+        # tail_rows: 마지막 줄(offset 이후)에서 나온 행 수. 다음 증분 때 이 행들을 다시 읽은 값으로 교체
+        offset = last_line_start(path, stat.st_size)
+        tail_rows = len(parse_environment_csv(path, offset, stat.st_size)) if offset else 0
+        meta.update(
+            version=ENV_CACHE_VERSION,
+            path=str(path.resolve()),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            offset=offset,
+            tail_sha1=tail_digest(path, offset),
+            tail_rows=tail_rows,
+            parts=parts,
+        )
+        _write_cache_meta(cache_dir / f"{key}.json", meta)
+    except OSError:
+        # 캐시 디렉터리에 쓸 수 없으면 캐시 없이 진행
+        pass
+
+
+def _valid_cache_meta(path: Path, cache_dir: Path, key: str) -> tuple[dict, list[Path]]:
+    meta = _read_cache_meta(cache_dir / f"{key}.json")
+    if meta.get("version") != ENV_CACHE_VERSION or meta.get("path") != str(path.resolve()):
+        return {}, []
+    files = _cache_part_files(cache_dir, key, meta.get("parts", 0))
+    if not all(f.exists() for f in files):
+        return {}, []
+    return meta, files
+
+
+def read_environment_csv(path: Path, cache_dir: Path = CACHE_DIR, retain: bool = True) -> pd.DataFrame:
+    # 경로 / 크기 / mtime / 내용 해시가 모두 같으면 Parquet 캐시 사용,
+    # 파일 끝에 줄이 추가되기만 했으면 추가분만 파싱해서 이어 붙임
+    # retain=False: 캐시 파일만 갱신하고 프레임은 메모리(_env_frames)에 남기지 않음
+    key = _cache_key(path)
+    with _env_lock(key):
+        held = key in _env_frames
+        df = _read_environment_csv_locked(path, cache_dir, key)
+        if not retain and not held:
+            _env_frames.pop(key, None)
+    # 호출 측에서 컬럼을 추가해도 보관 중인 프레임은 그대로 유지
+    return df.copy(deep=False)
+
+
+def _read_environment_csv_locked(path: Path, cache_dir: Path, key: str) -> pd.DataFrame:
+    stat = path.stat()
+    meta, files = _valid_cache_meta(path, cache_dir, key)
+    if not meta:
+        _env_frames.pop(key, None)
+        _env_pyramids.pop(key, None)
+
+    df = None
+    if meta and (meta["size"], meta["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        df = _load_cached_frame(key, files)
+
+    elif (
+        meta
+        and stat.st_size > meta["size"]
+        and meta["offset"] > 0
+        and tail_digest(path, meta["offset"]) == meta["tail_sha1"]
+    ):
+        # 증분 모드: 이미 읽은 부분은 그대로이고 뒤에 기록만 추가된 경우
+        # 지난번 마지막 줄(offset 이후)부터 다시 읽어 그 행들을 교체 (기록 중이던 줄이 완성됐을 수 있음)
+        df = _load_cached_frame(key, files)
+        if df is not None:
+            new = parse_environment_csv(path, offset=meta["offset"], end=stat.st_size)
+            keep = len(df) - meta["tail_rows"]
+            old_tail = df.iloc[keep:].reset_index(drop=True)
+            meta["sha1"] = None
+            added = new.iloc[len(old_tail):]
+            # 요약 병합은 새 줄이 기존 마지막 시각 뒤에 이어진다고 보고 경계 구간을 잇기 때문에
+            # 더 이른 시각의 줄이 섞여 들어오면 다시 계산
+            in_order = added.empty or not added["time"].min() < df["time"].max()
+            if in_order and new.iloc[:len(old_tail)].reset_index(drop=True).equals(old_tail):
+                # 보통의 경우: 마지막 줄이 그대로라 그 뒤의 행만 추가
+                update_pyramid(key, len(df), added)
+                df = pd.concat([df, added], ignore_index=True)
+                meta["summary"] = merge_summary(meta["summary"], summarize_frame(added))
+                _store_frame(path, stat, df, cache_dir, key, meta, new_rows=added)
+            else:
+                # 마지막 줄이 기록 중이었거나 순서가 어긋난 줄이 추가된 경우: 교체 후 요약 / 구간 집계는 다시 계산
+                df = pd.concat([df.iloc[:keep], new], ignore_index=True)
+                _env_pyramids.pop(key, None)
+                meta["summary"] = summarize_frame(df)
+                _store_frame(path, stat, df, cache_dir, key, meta)
+            _env_frames[key] = df
+
+    elif meta and stat.st_size == meta["size"]:
+        # mtime 만 바뀐 경우(touch, 복사 등)는 내용 해시로 재확인
+        digest = file_digest(path)
+        if meta.get("sha1") == digest:
+            df = _load_cached_frame(key, files)
+            if df is not None:
+                meta["mtime_ns"] = stat.st_mtime_ns
+                _write_cache_meta(cache_dir / f"{key}.json", meta)
+
+    if df is None:
+        df = parse_environment_csv(path, end=stat.st_size)
+        _env_frames[key] = df
+        _env_pyramids.pop(key, None)
+        meta = {"sha1": file_digest(path), "summary": summarize_frame(df)}
+        _store_frame(path, stat, df, cache_dir, key, meta)
+
+    return df
+
+
+def read_environment_summary(path: Path, cache_dir: Path = CACHE_DIR) -> dict:
+    # 캐시가 최신이면 데이터는 열지 않고 매니페스트에 저장된 요약만 사용
+    meta, _ = _valid_cache_meta(path, cache_dir, _cache_key(path))
+    stat = path.stat()
+    if meta and (meta["size"], meta["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+        return meta["summary"]
+
+    # 캐시가 없거나 파일이 자란 경우: 캐시는 갱신하되 시계열은 학교를 고를 때까지 메모리에 두지 않음
+    return summarize_frame(read_environment_csv(path, cache_dir, retain=False))
+
+
+# ==================================================
+# 청크 단위 스트리밍 집계 (파일 전체를 메모리에 올리지 않음)
+# ==================================================
+# 한 번에 읽는 CSV 블록 크기 (바이트)
+ENV_CHUNK_BYTES = int(os.environ.get("ENV_CHUNK_BYTES", 8 << 20))
+# 메모리에 남기는 다운샘플 시계열의 간격
+ROLLUP_FREQ = "h"
+
+
+def stream_environment_csv(path: Path, block_size: int = ENV_CHUNK_BYTES):
+    # 시간 컬럼은 블록마다 추론이 달라지지 않도록 문자열로 읽은 뒤 포맷 추정으로 변환
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=ENV_COLUMNS,
+            column_types={"time": pa.string(), **{c: pa.float32() for c in SENSOR_COLUMNS}},
+        ),
+    )
+    key = str(path.resolve())
+    for batch in reader:
+        df = batch.to_pandas()
+        df["time"] = parse_time_column(df["time"], key).astype("datetime64[us]")
+        yield df
+
+
+def rollup_frame(df: pd.DataFrame, freq: str = ROLLUP_FREQ) -> pd.DataFrame:
+    # 구간별 {컬럼}_count / _sum / _min / _max: 청크끼리 다시 합칠 수 있는 형태
+    # 이미 구간 집계된 시계열({컬럼}_min / _max 가 있음)을 더 굵게 묶을 때는 그 극값을 유지
+    keys = df["time"].dt.floor(freq)
+    values = df[SENSOR_COLUMNS].astype("float64")
+    rollup = values.groupby(keys).agg(["count", "sum"])
+    rollup.columns = [f"{c}_{stat}" for c, stat in rollup.columns]
+    for c in SENSOR_COLUMNS:
+        for stat in ("min", "max"):
+            source = df[f"{c}_{stat}"] if f"{c}_{stat}" in df else df[c]
+            rollup[f"{c}_{stat}"] = source.astype("float64").groupby(keys).agg(stat)
+    return rollup
+
+
+def merge_rollups(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    # 청크 경계에 걸친 구간만 실제로 합쳐짐
+    how = {}
+    for c in SENSOR_COLUMNS:
+        how.update({f"{c}_count": "sum", f"{c}_sum": "sum", f"{c}_min": "min", f"{c}_max": "max"})
+    return pd.concat([a, b]).groupby(level=0).agg(how)
+
+
+def rollup_series(rollup: pd.DataFrame) -> pd.DataFrame:
+    # 구간 평균을 센서 컬럼으로, 구간 최소 / 최대는 {컬럼}_min / {컬럼}_max 로
+    series = pd.DataFrame(index=rollup.index)
+    for c in SENSOR_COLUMNS:
+        series[c] = (rollup[f"{c}_sum"] / rollup[f"{c}_count"]).astype("float32")
+    for c in SENSOR_COLUMNS:
+        for stat in ("min", "max"):
+            series[f"{c}_{stat}"] = rollup[f"{c}_{stat}"].astype("float32")
+    series.index.name = "time"
+    return series.reset_index()
+
+
+# ==================================================
+# 다해상도 구간 집계 (시계열 차트용)
+# ==================================================
+# 원본 다음으로 고르는 구간 간격 (가는 것부터)
+PYRAMID_LEVELS = ["15min", "1h", "1D"]
+PYRAMID_LABELS = {None: "원본", "15min": "15분 평균", "1h": "1시간 평균", "1D": "1일 평균"}
+# 차트 한 계열에 보내는 최대 점 수
+ENV_MAX_POINTS = int(os.environ.get("ENV_MAX_POINTS", 2000))
+# 점 수를 줄이는 방식: 구간 평균(rollup) 또는 원본 점을 고르는 LTTB
+DOWNSAMPLE_MODES = {"rollup": "구간 평균", "lttb": "LTTB"}
+ENV_DOWNSAMPLE = os.environ.get("ENV_DOWNSAMPLE", "rollup")
+# 차트 렌더링: auto 는 계열당 점 수가 임계값을 넘으면 WebGL, webgl / svg 는 강제
+RENDER_MODES = {"auto": "자동", "webgl": "WebGL", "svg": "SVG"}
+PLOT_RENDER_MODE = os.environ.get("PLOT_RENDER_MODE", "auto")
+WEBGL_POINT_THRESHOLD = int(os.environ.get("WEBGL_POINT_THRESHOLD", 1000))
+
+
+def use_webgl(points: int, mode: str = PLOT_RENDER_MODE) -> bool:
+    if mode in ("webgl", "svg"):
+        return mode == "webgl"
+    return points > WEBGL_POINT_THRESHOLD
+
+
+def build_pyramid(df: pd.DataFrame) -> dict:
+    return {"rows": len(df), "levels": {freq: rollup_frame(df, freq) for freq in PYRAMID_LEVELS}}
+
+
+def update_pyramid(key: str, rows: int, new: pd.DataFrame):
+    # 증분 추가: 새 줄의 구간 집계만 합침 (경계 구간만 다시 계산됨)
+    pyramid = _env_pyramids.get(key)
+    if pyramid is None or pyramid["rows"] != rows:
+        _env_pyramids.pop(key, None)
+        return
+    if not new.empty:
+        for freq, rollup in pyramid["levels"].items():
+            pyramid["levels"][freq] = merge_rollups(rollup, rollup_frame(new, freq))
+    pyramid["rows"] += len(new)
+
+
+def read_environment_pyramid(path: Path, cache_dir: Path = CACHE_DIR) -> dict[str, pd.DataFrame]:
+    # 간격별 시계열 (time, 센서 평균, {컬럼}_min / _max)
+    df = read_environment_csv(path, cache_dir)
+    key = _cache_key(path)
+    pyramid = _env_pyramids.get(key)
+    if pyramid is None or pyramid["rows"] != len(df):
+        pyramid = _env_pyramids[key] = build_pyramid(df)
+    return {freq: rollup_series(rollup) for freq, rollup in pyramid["levels"].items()}
+
+
+def pick_pyramid_level(rows: int, level_rows, max_points: int = ENV_MAX_POINTS) -> str | None:
+    # 보이는 구간에서 점 수가 예산 안에 드는 가장 가는 해상도 (None = 원본)
+    # level_rows(freq): 그 해상도로 구간을 그릴 때 실제 행 수 (기간 / 간격이 아님: 결측 구간은 행이 없음)
+    # 가는 단계부터 필요한 만큼만 호출됨
+    if rows <= max_points:
+        return None
+    for freq in PYRAMID_LEVELS:
+        if level_rows(freq) <= max_points:
+            return freq
+    return PYRAMID_LEVELS[-1]
+
+
+def window_slice(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    # 시간순으로 정렬된 시계열에서 [start, end] 구간만 이진 탐색으로 잘라냄 (복사 없음)
+    times = df["time"]
+    if not times.is_monotonic_increasing:
+        df = df.sort_values("time", kind="stable")
+        times = df["time"]
+    lo = times.searchsorted(pd.Timestamp(start), side="left")
+    hi = times.searchsorted(pd.Timestamp(end), side="right")
+    return df.iloc[lo:hi]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: 구간마다 직전 선택점 / 다음 구간 평균과 만드는 삼각형이 가장 큰 점을 고름
+    # 구간 경계와 다음 구간 평균은 한 번에 계산하고, 직전 선택점에 의존하는 부분만 구간 단위로 순회
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    lengths = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / lengths
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / lengths
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - next_x[i]) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (next_y[i] - y[a])
+        )
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def lttb_downsample(df: pd.DataFrame, column: str, n_out: int = ENV_MAX_POINTS) -> pd.DataFrame:
+    # 한 계열(time, column)을 n_out 점으로. 결측은 먼저 제외
+    series = df[["time", column]].dropna()
+    if len(series) <= n_out:
+        return series
+    times = series["time"].to_numpy("datetime64[us]").astype("int64")
+    x = (times - times[0]) / 1e6
+    y = series[column].to_numpy("float64")
+    return series.iloc[lttb_indices(x, y, n_out)]
+
+
+def aggregate_environment_csv(path: Path, freq: str = ROLLUP_FREQ, block_size: int = ENV_CHUNK_BYTES) -> tuple[pd.DataFrame, dict]:
+    # 블록을 하나씩 읽으면서 요약과 구간 집계만 갱신 (최대 메모리는 블록 크기 + 구간 수에 비례)
+    summary = summarize_frame(pd.DataFrame(columns=ENV_COLUMNS))
+    rollup = None
+    for chunk in stream_environment_csv(path, block_size):
+        summary = merge_summary(summary, summarize_frame(chunk))
+        part = rollup_frame(chunk, freq)
+        rollup = part if rollup is None else merge_rollups(rollup, part)
+
+    if rollup is None:
+        return pd.DataFrame(columns=ENV_COLUMNS), summary
+    return rollup_series(rollup), summary
+
+
+# ==================================================
+# 생육 데이터 (XLSX 스트리밍 읽기)
+# ==================================================
+def read_xlsx_sheet(ws) -> pd.DataFrame:
+    header = list(next(ws.iter_rows(max_row=1, values_only=True), ()))
+    while header and header[-1] is None:
+        header.pop()
+    if not header:
+        return pd.DataFrame()
+
+    # 서식만 남은 빈 행이 시트 끝까지 이어질 수 있으므로 빈 행은 개수만 세어 두고
+    # 뒤에 값이 있는 행이 나올 때만 채움 (중간 빈 행은 유지, 끝의 빈 행만 제거)
+    records = []
+    blank = (None,) * len(header)
+    pending = 0
+    for row in ws.iter_rows(min_row=2, max_col=len(header), values_only=True):
+        if all(v is None for v in row):
+            pending += 1
+            continue
+        records.extend([blank] * pending)
+        pending = 0
+        records.append(row)
+
+    return pd.DataFrame.from_records(records, columns=header)
+
+
+def read_xlsx_sheets(xlsx: Path) -> dict[str, pd.DataFrame]:
+    # read_only 모드: 셀 객체 모델을 만들지 않고 시트 XML 을 순차적으로 읽음
+    wb = openpyxl.load_workbook(xlsx, read_only=True, data_only=True)
+    try:
+        return {ws.title: read_xlsx_sheet(ws) for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+
+# ==================================================
+# 데이터 로딩
+# ==================================================
+# 학교별 CSV 동시 파싱 워커 수 (1 이하면 순차 처리)
+ENV_LOAD_WORKERS = int(os.environ.get("ENV_LOAD_WORKERS", min(8, os.cpu_count() or 1)))
+# 매니페스트에 파일 내용 해시까지 포함할지 여부 (mtime 을 신뢰할 수 없는 환경용)
+MANIFEST_CONTENT_HASH = os.environ.get("MANIFEST_CONTENT_HASH", "0") == "1"
+# 시작 시 학교별 요약만 읽고, 시계열은 사이드바에서 학교를 고를 때 읽음
+ENV_LAZY_LOAD = os.environ.get("ENV_LAZY_LOAD", "0") == "1"
+# 원본 대신 청크 단위로 집계한 요약 + 시간 단위 다운샘플 시계열만 유지
+ENV_CHUNKED_LOAD = os.environ.get("ENV_CHUNKED_LOAD", "0") == "1"
+
+
+def data_manifest(data_dir: Path, suffix: str, content_hash: bool = MANIFEST_CONTENT_HASH) -> tuple:
+    # 로더 캐시 키: 입력 파일의 이름 / 크기 / mtime (선택적으로 내용 해시)
+    entries = []
+    for f in sorted(data_dir.iterdir()):
+        if f.suffix.lower() == suffix:
+            stat = f.stat()
+            entry = (f.name, stat.st_size, stat.st_mtime_ns)
+            if content_hash:
+                entry += (file_digest(f),)
+            entries.append(entry)
+    return tuple(entries)
+
+
+def dataset_fingerprint(*parts) -> str:
+    # 매니페스트 / 모드 설정 등 데이터셋 버전을 정하는 값들을 하나의 키로
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+
+def school_name(path: Path) -> str:
+    return normalize(path.stem).replace("_환경데이터", "")
+
+
+def school_column(school: str, length: int) -> pd.Categorical:
+    # 행마다 문자열을 두지 않고 int8 코드 하나로 표현
+    return pd.Categorical.from_codes(np.zeros(length, dtype="int8"), categories=[school])
+
+
+def concat_by_school(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    # 학교 카테고리를 하나로 맞춘 뒤 합쳐야 concat 후에도 category 로 유지됨
+    schools = sorted(set().union(*(df["school"].unique() for df in frames)))
+    dtype = pd.CategoricalDtype(schools)
+    return pd.concat(
+        [df.assign(school=df["school"].astype(dtype)) for df in frames],
+        ignore_index=True,
+    )
+
+
+def downcast_integers(df: pd.DataFrame) -> pd.DataFrame:
+    for c in df.select_dtypes("integer").columns:
+        df[c] = pd.to_numeric(df[c], downcast="integer")
+    return df
+
+
+def map_manifest(func, data_dir: Path, manifest: tuple, workers: int = ENV_LOAD_WORKERS) -> list:
+    def call(entry):
+        return func(data_dir / entry[0], entry)
+
+    if workers > 1 and len(manifest) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(manifest))) as pool:
+            return list(pool.map(call, manifest))
+    return [call(entry) for entry in manifest]
+
+
+# 파일 하나가 바뀌면 그 파일만 다시 파싱되도록 파일 단위로 캐시
+# 프레임을 돌려주는 로더는 cache_resource: 재실행 때 복사 / 역직렬화 없이 같은 객체를 공유 (호출 측은 읽기 전용)
+@st.cache_resource(max_entries=256)
+def load_environment_file(path: Path, entry: tuple) -> pd.DataFrame:
+    df = read_environment_csv(path)
+    df["school"] = school_column(school_name(path), len(df))
+    return df
+
+
+@st.cache_data(max_entries=256)
+def load_environment_summary_file(path: Path, entry: tuple) -> dict:
+    return read_environment_summary(path)
+
+
+@st.cache_resource(max_entries=256)
+def load_environment_rollup_file(path: Path, entry: tuple) -> tuple[pd.DataFrame, dict]:
+    series, summary = aggregate_environment_csv(path)
+    series["school"] = school_column(school_name(path), len(series))
+    return series, summary
+
+
+@st.cache_resource(max_entries=256)
+def load_environment_pyramid(path: Path, entry: tuple) -> dict[str, pd.DataFrame]:
+    return read_environment_pyramid(path)
+
+
+@st.cache_resource(max_entries=32)
+def build_series_pyramid(fingerprint: str, school: str, _series: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    # 파일 캐시가 없는 경로(SQLite / 청크 / 스냅샷)용: 메모리의 시계열에서 한 번만 계산
+    return {freq: rollup_series(rollup) for freq, rollup in build_pyramid(_series)["levels"].items()}
+
+
+def load_environment_data(data_dir: Path, manifest: tuple | None = None, workers: int = ENV_LOAD_WORKERS):
+    # 파일별 캐시 결과를 모으기만 하는 가벼운 조립 단계
+    if manifest is None:
+        manifest = data_manifest(data_dir, ".csv")
+
+    env = {}
+
+    for df in map_manifest(load_environment_file, data_dir, manifest, workers):
+        env[df["school"].iloc[0]] = df
+
+    return env
+
+
+def load_environment_summary(data_dir: Path, manifest: tuple | None = None, workers: int = ENV_LOAD_WORKERS) -> pd.DataFrame:
+    # 지연 모드 시작 화면용: 원본 시계열 없이 학교별 요약 표만 만듦
+    if manifest is None:
+        manifest = data_manifest(data_dir, ".csv")
+
+    summaries = map_manifest(load_environment_summary_file, data_dir, manifest, workers)
+    return summary_table({
+        school_name(data_dir / entry[0]): summary
+        for entry, summary in zip(manifest, summaries)
+    })
+
+
+def load_environment_rollups(data_dir: Path, manifest: tuple | None = None, workers: int = ENV_LOAD_WORKERS) -> tuple[dict, pd.DataFrame]:
+    # 청크 모드: load_environment_data 와 같은 dict (다운샘플 시계열) + 정확한 학교별 요약 표
+    if manifest is None:
+        manifest = data_manifest(data_dir, ".csv")
+
+    results = map_manifest(load_environment_rollup_file, data_dir, manifest, workers)
+    env = {}
+    summaries = {}
+    for entry, (series, summary) in zip(manifest, results):
+        school = school_name(data_dir / entry[0])
+        env[school] = series
+        summaries[school] = summary
+
+    return env, summary_table(summaries)
+
+
+@st.cache_resource(max_entries=4)
+def load_growth_data(data_dir: Path, manifest: tuple = ()):
+    return read_growth_workbook(data_dir)
+
+
+def read_growth_workbook(data_dir: Path) -> dict[str, pd.DataFrame]:
+    xlsx = None
+    for f in data_dir.iterdir():
+        if f.suffix.lower() == ".xlsx":
+            xlsx = f
+            break
+
+    if xlsx is None:
+        return {}
+
+    growth = {}
+
+    for sheet, df in read_xlsx_sheets(xlsx).items():
+        school = normalize(sheet)
+        df = downcast_integers(df)
+        df["school"] = school_column(school, len(df))
+        growth[school] = df
+
+    return growth
+
+
+# ==================================================
+# 공통 데이터 (재실행 간 공유)
+# ==================================================
+# cache_resource: 사이드바 변경 등으로 재실행돼도 복사 없이 같은 객체를 돌려줌.
+# 반환된 프레임은 여러 세션이 공유하므로 수정하지 말 것
+@st.cache_resource(max_entries=4)
+def build_common_frames(fingerprint: str, _env_data: dict, _growth_data: dict, _env_summary: pd.DataFrame, _schools: list):
+    # 지연 / SQLite 모드에서는 전체 원본을 합치지 않음
+    env_all = concat_by_school(list(_env_data.values())) if _env_data else None
+    # 시트마다 정수 / 실수가 섞여 있어 합친 뒤 다시 작은 정수형으로
+    growth_all = downcast_integers(concat_by_school(list(_growth_data.values())))
+
+    # 측정 간격이 학교마다 달라 단순 평균 대신 시간 가중 평균을 목표 EC 로 사용
+    ec_map = _env_summary.loc[_schools, ("ec", "twmean")].to_dict()
+    # EC 도 학교처럼 category (작은 정수 코드) 로 두어 groupby 가 코드 위에서 돌게 함
+    growth_all["EC"] = pd.Categorical(
+        growth_all["school"].map(ec_map).astype("float64"),
+        categories=sorted(set(ec_map.values())),
+    )
+    return env_all, growth_all, ec_map
+
+
+# ==================================================
+# 학교별 집계 표 (모든 탭이 공유)
+# ==================================================
+AGG_STATS = ["mean", "std", "min", "max", "count", "sem"]
+# 환경 데이터에만 있는 시간 가중 통계
+ENV_TIME_STATS = ["twmean", "span"]
+# 생육 데이터에서 집계하지 않는 식별자 컬럼
+GROWTH_ID_COLUMNS = ["개체번호"]
+# 학교별 생육 개체수를 담는 집계 표 컬럼
+GROWTH_COUNT = "개체수"
+
+
+@st.cache_resource(max_entries=4)
+def build_aggregate_table(fingerprint: str, _env_summary: pd.DataFrame, _growth_all: pd.DataFrame) -> pd.DataFrame:
+    # 학교 x (컬럼, 통계). 환경은 저장된 요약에서 바로, 생육은 groupby 한 번으로 계산
+    env = _env_summary[[(c, stat) for c in SENSOR_COLUMNS for stat in AGG_STATS + ENV_TIME_STATS]]
+
+    numeric = [
+        c for c in _growth_all.select_dtypes("number").columns
+        if c not in GROWTH_ID_COLUMNS
+    ]
+    grouped = _growth_all.groupby("school", observed=True)
+    growth = grouped[numeric].agg(AGG_STATS)
+    growth[(GROWTH_COUNT, "count")] = grouped.size()
+    growth.index = growth.index.astype(str)
+
+    return env.join(growth, how="outer").astype("float64")
+
+
+BOX_QUANTILES = [0.25, 0.5, 0.75]
+
+
+@st.cache_resource(max_entries=8)
+def build_box_stats(fingerprint: str, column: str, _growth_all: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # 학교별 상자 그림 통계, 1.5 IQR 울타리
+    # plotly 의 기본 사분위수(quartilemethod="linear")는 p*n - 0.5 위치를 보간 = numpy 의 "hazen"
+    # 원본 개체 대신 이 통계와 울타리 밖 점만 브라우저로 보냄
+    # 학교는 범주형 그대로 묶고(관측된 학교만) 결과 인덱스만 문자열로
+    values = _growth_all[["school", column]].dropna()
+    stats = pd.DataFrame.from_dict(
+        {
+            school: np.quantile(v.to_numpy("float64"), BOX_QUANTILES, method="hazen")
+            for school, v in values.groupby("school", observed=True)[column]
+        },
+        orient="index",
+        columns=["q1", "median", "q3"],
+    )
+    stats.index = stats.index.astype(str)
+
+    # 행마다 자기 학교의 울타리: 범주 코드로 바로 조회
+    iqr = stats["q3"] - stats["q1"]
+    categories = values["school"].cat.categories.astype(str)
+    codes = values["school"].cat.codes.to_numpy()
+    low = (stats["q1"] - 1.5 * iqr).reindex(categories).to_numpy()[codes]
+    high = (stats["q3"] + 1.5 * iqr).reindex(categories).to_numpy()[codes]
+
+    inside = (values[column] >= low) & (values[column] <= high)
+    fences = values[inside].groupby("school", observed=True)[column].agg(["min", "max"])
+    fences.index = fences.index.astype(str)
+    stats["lowerfence"] = fences["min"]
+    stats["upperfence"] = fences["max"]
+
+    outliers = values[~inside].reset_index(drop=True)
+    outliers["school"] = outliers["school"].astype(str)
+    return stats, outliers
+
+
+def overall_time_mean(table: pd.DataFrame, column: str) -> float:
+    # 학교별 시간 가중 평균을 적분 구간 길이로 가중해 전체 평균으로
+    stats = table[column].dropna(subset=["twmean"])
+    return (stats["twmean"] * stats["span"]).sum() / stats["span"].sum()
+
+
+def ec_group_means(table: pd.DataFrame, ec_map: dict, column: str) -> pd.Series:
+    # EC 목표값별 평균 (여러 학교가 같은 EC 면 개체수로 가중)
+    stats = table.loc[list(ec_map), column]
+    ec = pd.Series(ec_map)
+    weighted = (stats["mean"] * stats["count"]).groupby(ec).sum()
+    return (weighted / stats["count"].groupby(ec).sum()).sort_index()
+
+
+# ==================================================
+# 공통 시간축 정렬 (학교 간 비교용)
+# ==================================================
+# 학교마다 측정 간격 / 시작 시각이 달라 같은 격자로 다시 묶어야 겹쳐 볼 수 있음
+GRID_FREQS = {"15분": "15min", "1시간": "1h", "1일": "1D"}
+ENV_GRID_FREQ = os.environ.get("ENV_GRID_FREQ", "1h")
+
+
+def resample_to_grid(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    # origin="epoch": 모든 학교가 같은 경계의 구간으로 묶이도록 고정
+    return (
+        df.set_index("time")[SENSOR_COLUMNS]
+        .resample(freq, origin="epoch")
+        .mean()
+    )
+
+
+@st.cache_resource(max_entries=8)
+def build_time_grid(fingerprint: str, freq: str, schools: tuple, _load) -> pd.DataFrame:
+    # 시간 x (센서 컬럼, 학교) 표. 측정이 없는 구간은 NaN
+    # 학교별 시계열은 캐시에 없을 때만 _load 로 불러옴 (재실행마다 모으지 않음)
+    if not schools:
+        return pd.DataFrame()
+    frames = {school: resample_to_grid(_load(school), freq) for school in schools}
+    grid = pd.concat(frames, axis=1, names=["school", "metric"])
+    return grid.swaplevel(axis=1).sort_index(axis=1)
+
+
+# ==================================================
+# 차트 캐시
+# ==================================================
+@st.cache_resource(max_entries=64)
+def cached_figure(name: str, fingerprint: str, inputs: tuple, _build):
+    # (차트 이름, 데이터셋 버전, 차트가 쓰는 입력값) 이 같으면 만들어 둔 Figure 를 그대로 반환
+    # JSON 으로 보관하면 내보낼 때 plotly 가 Figure 를 다시 검증해서 새로 만드는 것만큼 걸림
+    return _build()
+
+
+# ==================================================
+# 센서 데이터 SQLite 저장소
+# ==================================================
+# "pandas": 메모리의 DataFrame 사용 / "sqlite": 로컬 DB 에 적재 후 SQL 로 조회
+ENV_BACKEND = os.environ.get("ENV_BACKEND", "pandas")
+ENV_DB_PATH = CACHE_DIR / "env.sqlite"
+
+ENV_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS env (
+    school TEXT NOT NULL,
+    time INTEGER NOT NULL,  -- epoch 마이크로초
+    temperature REAL,
+    humidity REAL,
+    ph REAL,
+    ec REAL
+);
+CREATE INDEX IF NOT EXISTS env_school_time ON env (school, time);
+CREATE TABLE IF NOT EXISTS env_sources (
+    school TEXT PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+"""
+
+
+def connect_environment_db(db_path: Path = ENV_DB_PATH) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path)
+    con.executescript(ENV_DB_SCHEMA)
+    return con
+
+
+def sync_environment_db(data_dir: Path, manifest: tuple, db_path: Path = ENV_DB_PATH):
+    # 매니페스트 항목이 바뀐 학교만 지우고 다시 적재
+    # 재실행마다 호출되므로 같은 DB 의 동기화는 한 번에 하나씩, 삭제 ~ 적재 ~ env_sources 기록은 한 트랜잭션
+    # (to_sql 은 중간에 커밋하므로 executemany 로 직접 넣음)
+    with _env_lock(f"sqlite:{Path(db_path).resolve()}"):
+        con = connect_environment_db(db_path)
+        try:
+            # IMMEDIATE: 다른 프로세스의 동기화도 쓰기 잠금을 기다린 뒤 최신 env_sources 를 봄
+            con.execute("BEGIN IMMEDIATE")
+            stored = dict(con.execute("SELECT school, entry FROM env_sources"))
+            current = {school_name(data_dir / e[0]): e for e in manifest}
+
+            for school in stored.keys() - current.keys():
+                con.execute("DELETE FROM env WHERE school = ?", (school,))
+                con.execute("DELETE FROM env_sources WHERE school = ?", (school,))
+
+            insert = f"INSERT INTO env (school, {', '.join(ENV_COLUMNS)}) VALUES ({', '.join('?' * (len(ENV_COLUMNS) + 1))})"
+            for school, entry in current.items():
+                key = json.dumps(entry)
+                if stored.get(school) == key:
+                    continue
+                con.execute("DELETE FROM env WHERE school = ?", (school,))
+                # 블록 단위로 흘려 넣음: 파일 전체를 메모리에 올리거나 Parquet 캐시에 남기지 않음
+                for chunk in stream_environment_csv(data_dir / entry[0]):
+                    columns = [chunk["time"].astype("int64").tolist()]
+                    columns += [chunk[c].astype("float64").tolist() for c in SENSOR_COLUMNS]
+                    con.executemany(insert, zip(itertools.repeat(school), *columns))
+                con.execute("INSERT OR REPLACE INTO env_sources VALUES (?, ?)", (school, key))
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        finally:
+            con.close()
+
+
+@st.cache_data(max_entries=4)
+def query_environment_summary(manifest: tuple, db_path: Path = ENV_DB_PATH) -> pd.DataFrame:
+    stats = ", ".join(
+        f"COUNT({c}), TOTAL({c}), TOTAL({c} * {c}), MIN({c}), MAX({c})" for c in SENSOR_COLUMNS
+    )
+    con = connect_environment_db(db_path)
+    try:
+        rows = con.execute(f"SELECT school, COUNT(*), {stats} FROM env GROUP BY school").fetchall()
+        # 시간 가중 평균용 사다리꼴 적분: LAG 로 직전 측정값과 짝지음 (time 은 마이크로초)
+        integrals = {}
+        for c in SENSOR_COLUMNS:
+            integrals[c] = {
+                school: (area or 0.0, span or 0.0)
+                for school, area, span in con.execute(
+                    f"""
+                    SELECT school, TOTAL((time - prev_time) * ({c} + prev_value) / 2.0) / 1e6,
+                           TOTAL(time - prev_time) / 1e6
+                    FROM (
+                        SELECT school, time, {c},
+                               LAG(time) OVER w AS prev_time, LAG({c}) OVER w AS prev_value
+                        FROM env WHERE {c} IS NOT NULL
+                        WINDOW w AS (PARTITION BY school ORDER BY time)
+                    )
+                    WHERE time > prev_time AND time - prev_time <= ?
+                    GROUP BY school
+                    """,
+                    (TW_MAX_GAP_SECONDS * 1e6,),
+                )
+            }
+    finally:
+        con.close()
+
+    summaries = {}
+    for school, count, *values in rows:
+        summary = {"rows": count}
+        for i, c in enumerate(SENSOR_COLUMNS):
+            n, total, squares, lo, hi = values[5 * i:5 * i + 5]
+            m2 = max(squares - total * total / n, 0.0) if n else 0.0
+            area, span = integrals[c].get(school, (0.0, 0.0))
+            summary[c] = {
+                "count": n, "sum": total, "m2": m2, "min": lo, "max": hi,
+                "area": area, "span": span,
+            }
+        summaries[school] = summary
+
+    return summary_table(summaries)
+
+
+def _window_clause(school: str, start: pd.Timestamp | None, end: pd.Timestamp | None) -> tuple[str, list]:
+    # (school, time) 인덱스를 타는 WHERE 절. 시각은 epoch µs 로 저장됨
+    sql = " WHERE school = ?"
+    params = [school]
+    if start is not None:
+        sql += " AND time >= ?"
+        params.append(pd.Timestamp(start).value // 1000)
+    if end is not None:
+        sql += " AND time <= ?"
+        params.append(pd.Timestamp(end).value // 1000)
+    return sql, params
+
+
+@st.cache_data(max_entries=64)
+def query_environment_extent(
+    school: str,
+    manifest: tuple,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    db_path: Path = ENV_DB_PATH,
+) -> tuple[int, pd.Timestamp, pd.Timestamp]:
+    # 구간의 행 수와 처음 / 마지막 시각만 조회 (시계열은 읽지 않고 인덱스만 훑음)
+    where, params = _window_clause(school, start, end)
+    con = connect_environment_db(db_path)
+    try:
+        rows, t_min, t_max = con.execute(
+            "SELECT COUNT(*), MIN(time), MAX(time) FROM env" + where, params
+        ).fetchone()
+    finally:
+        con.close()
+    return rows, pd.to_datetime(t_min, unit="us"), pd.to_datetime(t_max, unit="us")
+
+
+@st.cache_data(max_entries=32)
+def query_environment_rollup(
+    school: str,
+    manifest: tuple,
+    freq: str,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    db_path: Path = ENV_DB_PATH,
+) -> pd.DataFrame:
+    # 구간 평균 / 최소 / 최대를 SQLite 에서 바로 집계 (rollup_series 와 같은 형태)
+    bucket = pd.Timedelta(freq).value // 1000
+    columns = [f"AVG({c}) AS {c}" for c in SENSOR_COLUMNS]
+    columns += [f"{stat.upper()}({c}) AS {c}_{stat}" for c in SENSOR_COLUMNS for stat in ("min", "max")]
+    where, params = _window_clause(school, start, end)
+    sql = f"SELECT (time / {bucket}) * {bucket} AS time, {', '.join(columns)} FROM env{where} GROUP BY 1 ORDER BY 1"
+
+    con = connect_environment_db(db_path)
+    try:
+        df = pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+    df["time"] = pd.to_datetime(df["time"], unit="us")
+    return df.astype({c: "float32" for c in df.columns if c != "time"})
+
+
+@st.cache_data(max_entries=32)
+def query_environment_series(
+    school: str,
+    manifest: tuple,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    db_path: Path = ENV_DB_PATH,
+) -> pd.DataFrame:
+    # (school, time) 인덱스로 구간만 조회
+    where, params = _window_clause(school, start, end)
+    sql = f"SELECT {', '.join(ENV_COLUMNS)} FROM env{where} ORDER BY time"
+
+    con = connect_environment_db(db_path)
+    try:
+        df = pd.read_sql_query(sql, con, params=params, dtype=ENV_DTYPES)
+    finally:
+        con.close()
+
+    df["time"] = pd.to_datetime(df["time"], unit="us")
+    df["school"] = school_column(school, len(df))
+    return df
+
+
+def export_environment_csv(db_path: Path = ENV_DB_PATH, chunksize: int = 100_000) -> bytes:
+    # 메모리에 전체를 올리지 않도록 청크 단위로 CSV 작성
+    buffer = io.StringIO()
+    con = connect_environment_db(db_path)
+    try:
+        chunks = pd.read_sql_query(
+            f"SELECT {', '.join(ENV_COLUMNS)}, school FROM env ORDER BY school, time",
+            con,
+            chunksize=chunksize,
+            dtype=ENV_DTYPES,
+        )
+        for i, chunk in enumerate(chunks):
+            chunk["time"] = pd.to_datetime(chunk["time"], unit="us")
+            chunk.to_csv(buffer, index=False, header=i == 0)
+    finally:
+        con.close()
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+# ==================================================
+# 데이터셋 스냅샷 (build_snapshot.py 로 생성)
+# ==================================================
+# 환경 데이터 전체를 Arrow IPC 파일 하나에 담고,
+# 학교별 요약 / 생육 데이터 / 매니페스트는 같은 파일의 스키마 메타데이터에 저장
+SNAPSHOT_PATH = Path(os.environ.get("DATA_SNAPSHOT", CACHE_DIR / "snapshot.arrow"))
+SNAPSHOT_VERSION = 3
+
+
+def _table_to_bytes(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _bytes_to_table(data: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def _split_by_school(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    return {
+        school: group.reset_index(drop=True)
+        for school, group in df.groupby("school", sort=False, observed=True)
+    }
+
+
+def build_snapshot(data_dir: Path, output: Path = SNAPSHOT_PATH, workers: int = ENV_LOAD_WORKERS) -> dict:
+    env_manifest = data_manifest(data_dir, ".csv")
+    growth_manifest = data_manifest(data_dir, ".xlsx")
+
+    frames = map_manifest(lambda path, entry: read_environment_csv(path), data_dir, env_manifest, workers)
+    env = {
+        school_name(data_dir / entry[0]): df
+        for entry, df in zip(env_manifest, frames)
+    }
+    growth = read_growth_workbook(data_dir)
+    if not env or not growth:
+        raise ValueError(f"{data_dir} 에 환경 데이터 또는 생육 데이터가 없습니다.")
+
+    env_all = concat_by_school([
+        df.assign(school=school_column(school, len(df)))
+        for school, df in env.items()
+    ])
+    summary = summary_table({s: summarize_frame(df) for s, df in env.items()})
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "data_dir": str(data_dir.resolve()),
+        "env": env_manifest,
+        "growth": growth_manifest,
+        "schools": list(env),
+        "growth_schools": list(growth),
+    }
+
+    table = pa.Table.from_pandas(env_all, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **table.schema.metadata,
+        b"snapshot": json.dumps(manifest).encode("utf-8"),
+        b"summary": _table_to_bytes(summary),
+        # 시트마다 dtype 이 달라서 학교별로 따로 저장
+        **{
+            f"growth/{school}".encode("utf-8"): _table_to_bytes(df)
+            for school, df in growth.items()
+        },
+    })
+
+    # 앱이 읽는 도중 덮어쓰지 않도록 임시 파일에 쓴 뒤 교체
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp.replace(output)
+
+    return manifest
+
+
+@st.cache_resource(max_entries=2)
+def load_snapshot(path: Path, entry: tuple):
+    # 메모리 맵으로 한 번에 읽음 (원본 CSV / XLSX 는 열지 않음)
+    # 재실행 때 복사하지 않고 같은 프레임을 돌려주므로 호출 측은 읽기 전용으로 사용
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        metadata = reader.schema.metadata
+        manifest = json.loads(metadata[b"snapshot"])
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"지원하지 않는 스냅샷 버전: {manifest.get('version')}")
+        env_all = reader.read_all().to_pandas()
+
+    env = _split_by_school(env_all)
+    growth = {
+        school: _bytes_to_table(metadata[f"growth/{school}".encode("utf-8")])
+        for school in manifest["growth_schools"]
+    }
+    summary = _bytes_to_table(metadata[b"summary"])
+    return env, growth, summary, manifest
+
+
+def snapshot_is_current(manifest: dict, data_dir: Path) -> bool:
+    # 스냅샷을 만든 뒤 data 폴더의 CSV / XLSX 가 바뀌었는지 (이름 / 크기 / mtime 매니페스트 비교)
+    stored = (
+        tuple(tuple(e) for e in manifest["env"]),
+        tuple(tuple(e) for e in manifest["growth"]),
+    )
+    content_hash = any(len(e) > 3 for group in stored for e in group)
+    current = (
+        data_manifest(data_dir, ".csv", content_hash),
+        data_manifest(data_dir, ".xlsx", content_hash),
+    )
+    return stored == current
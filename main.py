@@ -4,8 +4,54 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
-import unicodedata
 import io
+from datetime import timedelta
+
+from data_loader import (
+    DOWNSAMPLE_MODES,
+    ENV_BACKEND,
+    ENV_CHUNKED_LOAD,
+    ENV_DOWNSAMPLE,
+    ENV_GRID_FREQ,
+    ENV_LAZY_LOAD,
+    ENV_MAX_POINTS,
+    GRID_FREQS,
+    GROWTH_COUNT,
+    PLOT_RENDER_MODE,
+    PYRAMID_LABELS,
+    RENDER_MODES,
+    SENSOR_COLUMNS,
+    SNAPSHOT_PATH,
+    build_aggregate_table,
+    build_box_stats,
+    build_common_frames,
+    build_series_pyramid,
+    build_time_grid,
+    cached_figure,
+    data_manifest,
+    dataset_fingerprint,
+    ec_group_means,
+    export_environment_csv,
+    load_environment_data,
+    load_environment_file,
+    load_environment_pyramid,
+    load_environment_rollups,
+    load_environment_summary,
+    load_growth_data,
+    load_snapshot,
+    lttb_downsample,
+    overall_time_mean,
+    pick_pyramid_level,
+    query_environment_extent,
+    query_environment_rollup,
+    query_environment_series,
+    query_environment_summary,
+    school_name,
+    snapshot_is_current,
+    sync_environment_db,
+    use_webgl,
+    window_slice,
+)
 
 # ==================================================
 # 기본 설정
@@ -29,71 +75,60 @@ PLOTLY_FONT = dict(
     family="Malgun Gothic, Apple SD Gothic Neo, sans-serif"
 )
 
-# ==================================================
-# 유틸: NFC/NFD 완전 대응
-# ==================================================
-def normalize(text: str) -> str:
-    return unicodedata.normalize("NFC", text)
-
-# ==================================================
-# 데이터 로딩
-# ==================================================
-@st.cache_data
-def load_environment_data(data_dir: Path):
-    env = {}
-
-    for f in data_dir.iterdir():
-        if f.suffix.lower() == ".csv":
-            name_nfc = normalize(f.stem)
-            df = pd.read_csv(f)
-            df["time"] = pd.to_datetime(df["time"])
-            df["school"] = name_nfc.replace("_환경데이터", "")
-            env[df["school"].iloc[0]] = df
-
-    return env
-
-
-@st.cache_data
-def load_growth_data(data_dir: Path):
-    xlsx = None
-    for f in data_dir.iterdir():
-        if f.suffix.lower() == ".xlsx":
-            xlsx = f
-            break
-
-    if xlsx is None:
-        return {}
-
-    xls = pd.ExcelFile(xlsx)
-    growth = {}
-
-    for sheet in xls.sheet_names:
-        school = normalize(sheet)
-        df = xls.parse(sheet)
-        df["school"] = school
-        growth[school] = df
-
-    return growth
-
-
 # ==================================================
 # 데이터 로드
 # ==================================================
 DATA_DIR = Path("data")
 
 with st.spinner("📂 데이터 로딩 중..."):
-    if not DATA_DIR.exists():
-        st.error("❌ data 폴더가 존재하지 않습니다.")
-        st.stop()
-
-    env_data = load_environment_data(DATA_DIR)
-    growth_data = load_growth_data(DATA_DIR)
+    snapshot = None
+    if SNAPSHOT_PATH.exists():
+        # build_snapshot.py 로 만든 스냅샷이 있으면 원본 CSV / XLSX 를 읽지 않음
+        stat = SNAPSHOT_PATH.stat()
+        try:
+            snapshot = load_snapshot(SNAPSHOT_PATH, (stat.st_size, stat.st_mtime_ns))
+        except (OSError, ValueError, KeyError):
+            st.warning("⚠️ 스냅샷을 읽을 수 없어 원본 데이터를 불러옵니다.")
+        # data 폴더가 있으면 스냅샷 이후 원본이 바뀌었는지 확인 (바뀌었으면 원본 + 증분 캐시 사용)
+        if snapshot is not None and DATA_DIR.exists() and not snapshot_is_current(snapshot[3], DATA_DIR):
+            st.warning("⚠️ 스냅샷 이후 data 폴더가 바뀌어 원본 데이터를 불러옵니다. build_snapshot.py 로 스냅샷을 다시 만드세요.")
+            snapshot = None
+
+    if snapshot is not None:
+        env_data, growth_data, env_summary, snapshot_manifest = snapshot
+        env_manifest = tuple(tuple(e) for e in snapshot_manifest["env"])
+        fingerprint = dataset_fingerprint("snapshot", SNAPSHOT_PATH, stat.st_size, stat.st_mtime_ns)
+    else:
+        if not DATA_DIR.exists():
+            st.error("❌ data 폴더가 존재하지 않습니다.")
+            st.stop()
+
+        # 입력 파일이 바뀐 로더만 다시 계산됨
+        env_manifest = data_manifest(DATA_DIR, ".csv")
+        if ENV_BACKEND == "sqlite":
+            sync_environment_db(DATA_DIR, env_manifest)
+            env_data = {}
+            env_summary = query_environment_summary(env_manifest)
+        elif ENV_LAZY_LOAD:
+            env_data = {}
+            env_summary = load_environment_summary(DATA_DIR, env_manifest)
+        elif ENV_CHUNKED_LOAD:
+            # 원본은 청크 단위로 흘려보내고 요약 + 시간 단위 시계열만 메모리에 유지
+            env_data, env_summary = load_environment_rollups(DATA_DIR, env_manifest)
+        else:
+            env_data = load_environment_data(DATA_DIR, env_manifest)
+            env_summary = load_environment_summary(DATA_DIR, env_manifest)
+        growth_manifest = data_manifest(DATA_DIR, ".xlsx")
+        growth_data = load_growth_data(DATA_DIR, growth_manifest)
+        fingerprint = dataset_fingerprint(
+            ENV_BACKEND, ENV_LAZY_LOAD, ENV_CHUNKED_LOAD, env_manifest, growth_manifest
+        )
 
-if not env_data or not growth_data:
+if env_summary.empty or not growth_data:
     st.error("❌ 데이터 파일이 없습니다.")
     st.stop()
 
-schools = sorted(set(env_data.keys()) & set(growth_data.keys()))
+schools = sorted(set(env_summary.index) & set(growth_data.keys()))
 if not schools:
     st.error("❌ 환경 데이터와 생육 데이터가 매칭되지 않습니다.")
     st.stop()
@@ -101,33 +136,98 @@ if not schools:
 # ==================================================
 # 사이드바
 # ==================================================
-selected_school = st.sidebar.selectbox(
-    "🏫 학교 선택",
-    ["전체"] + schools
+# 다시 실행되면서 매니페스트가 갱신되므로, 늘어난 센서 로그는 추가된 줄만 다시 파싱
+st.sidebar.button("🔄 데이터 새로고침")
+# 점이 많은 산점도 / 시계열은 WebGL 로 그려 확대 / 이동이 느려지지 않게 함
+render_mode = st.sidebar.radio(
+    "🖥️ 차트 렌더링",
+    list(RENDER_MODES),
+    index=list(RENDER_MODES).index(PLOT_RENDER_MODE) if PLOT_RENDER_MODE in RENDER_MODES else 0,
+    format_func=RENDER_MODES.get,
+    horizontal=True
 )
+if snapshot is not None:
+    st.sidebar.caption(f"📦 스냅샷 데이터 ({snapshot_manifest['created']})")
 
 # ==================================================
 # 공통 데이터
 # ==================================================
-env_all = pd.concat(env_data.values(), ignore_index=True)
-growth_all = pd.concat(growth_data.values(), ignore_index=True)
-
-ec_map = {s: env_data[s]["ec"].mean() for s in schools}
-growth_all["EC"] = growth_all["school"].map(ec_map)
+# 데이터셋 버전(fingerprint)이 같으면 재실행 시 복사 없이 재사용
+env_all, growth_all, ec_map = build_common_frames(
+    fingerprint, env_data, growth_data, env_summary, schools
+)
+# 학교별 집계 표: 세 탭이 groupby 대신 이 표를 읽음
+agg = build_aggregate_table(fingerprint, env_summary, growth_all)
+
+METRIC_LABELS = {"temperature": "온도", "humidity": "습도", "ph": "pH", "ec": "EC"}
+
+
+def load_school_series(school):
+    if env_data:
+        return env_data[school]
+    if ENV_BACKEND == "sqlite":
+        return query_environment_series(school, env_manifest)
+    # 지연 모드: 필요한 학교의 시계열만 이때 읽음
+    entry = next(e for e in env_manifest if school_name(DATA_DIR / e[0]) == school)
+    return load_environment_file(DATA_DIR / entry[0], entry)
+
+
+def load_school_pyramid(school, series):
+    # 원본 CSV 캐시를 쓰는 경로는 파일별 구간 집계를 증분 갱신, 나머지는 메모리의 시계열에서 계산
+    if snapshot is None and ENV_BACKEND != "sqlite" and not ENV_CHUNKED_LOAD:
+        entry = next(e for e in env_manifest if school_name(DATA_DIR / e[0]) == school)
+        return load_environment_pyramid(DATA_DIR / entry[0], entry)
+    return build_series_pyramid(fingerprint, school, series)
+
+
+def scatter_trace(points, **kwargs):
+    trace = go.Scattergl if use_webgl(points, render_mode) else go.Scatter
+    return trace(**kwargs)
+
+
+def add_series_trace(fig, view, column, row, banded, max_points=None):
+    # 구간 평균이면 최소~최대 범위를 띠로 함께 그려 극값이 사라지지 않게 함
+    # max_points 가 있으면 원본에서 LTTB 로 계열마다 점을 골라 그림
+    if max_points is not None:
+        view = lttb_downsample(view, column, max_points)
+    if banded:
+        fig.add_trace(
+            scatter_trace(
+                len(view),
+                x=view["time"], y=view[f"{column}_max"],
+                mode="lines", line_width=0, showlegend=False, hoverinfo="skip"
+            ),
+            row=row, col=1
+        )
+        fig.add_trace(
+            scatter_trace(
+                len(view),
+                x=view["time"], y=view[f"{column}_min"],
+                mode="lines", line_width=0, fill="tonexty", showlegend=False, hoverinfo="skip"
+            ),
+            row=row, col=1
+        )
+    fig.add_trace(
+        scatter_trace(len(view), x=view["time"], y=view[column], mode="lines"),
+        row=row, col=1
+    )
 
 # ==================================================
 # UI
 # ==================================================
 st.title("🌱 극지식물 최적 EC 농도 연구")
 
+# on_change="rerun": 선택된 탭만 .open 이 True 가 되어 그 탭의 내용만 계산
 tab1, tab2, tab3 = st.tabs(
-    ["📖 실험 개요", "🌡️ 환경 데이터", "📊 생육 결과"]
+    ["📖 실험 개요", "🌡️ 환경 데이터", "📊 생육 결과"],
+    key="active_tab",
+    on_change="rerun"
 )
 
 # ==================================================
 # Tab 1 : 실험 개요
 # ==================================================
-with tab1:
+def render_overview():
     st.subheader("연구 배경 및 목적")
     st.markdown("""
     극지 환경을 모사한 조건에서  
@@ -140,86 +240,112 @@ with tab1:
         summary.append({
             "학교명": s,
             "EC 목표": round(ec_map[s], 2),
-            "개체수": len(growth_data[s])
+            "개체수": int(agg.loc[s, (GROWTH_COUNT, "count")])
         })
 
     st.dataframe(pd.DataFrame(summary), use_container_width=True)
 
-    optimal_ec = (
-        growth_all.groupby("EC")["생중량(g)"]
-        .mean()
-        .idxmax()
-    )
+    optimal_ec = ec_group_means(agg, ec_map, "생중량(g)").idxmax()
 
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("총 개체수", len(growth_all))
-    c2.metric("평균 온도", f"{env_all['temperature'].mean():.1f}℃")
-    c3.metric("평균 습도", f"{env_all['humidity'].mean():.1f}%")
+    c2.metric("평균 온도", f"{overall_time_mean(agg, 'temperature'):.1f}℃")
+    c3.metric("평균 습도", f"{overall_time_mean(agg, 'humidity'):.1f}%")
     c4.metric("⭐ 최적 EC", f"{optimal_ec:.2f}")
 
 # ==================================================
 # Tab 2 : 환경 데이터
 # ==================================================
-with tab2:
-    st.subheader("학교별 환경 평균 비교")
-
-    avg_env = env_all.groupby("school").mean(numeric_only=True)
-
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=[
-            "평균 온도", "평균 습도",
-            "평균 pH", "목표 EC vs 실측 EC"
-        ]
-    )
-
-    fig.add_bar(x=avg_env.index, y=avg_env["temperature"], row=1, col=1)
-    fig.add_bar(x=avg_env.index, y=avg_env["humidity"], row=1, col=2)
-    fig.add_bar(x=avg_env.index, y=avg_env["ph"], row=2, col=1)
-
-    fig.add_bar(
-        x=avg_env.index,
-        y=list(ec_map.values()),
-        name="목표 EC",
-        row=2, col=2
+@st.fragment
+def render_school_series():
+    # 학교를 바꾸면 이 부분만 다시 실행됨 (요약 / 생육 차트 / 내보내기는 다시 계산하지 않음)
+    selected_school = st.selectbox(
+        "🏫 학교 선택",
+        ["전체"] + schools,
+        key="selected_school"
     )
-    fig.add_bar(
-        x=avg_env.index,
-        y=avg_env["ec"],
-        name="실측 EC",
-        row=2, col=2
+    if selected_school == "전체":
+        return
+
+    d1, d2 = st.columns(2)
+    downsample = d1.radio(
+        "다운샘플링",
+        list(DOWNSAMPLE_MODES),
+        index=list(DOWNSAMPLE_MODES).index(ENV_DOWNSAMPLE) if ENV_DOWNSAMPLE in DOWNSAMPLE_MODES else 0,
+        format_func=DOWNSAMPLE_MODES.get,
+        horizontal=True
     )
-
-    fig.update_layout(
-        height=650,
-        barmode="group",
-        font=PLOTLY_FONT
+    max_points = d2.slider(
+        "계열당 최대 점 수", 200, 10000, min(max(ENV_MAX_POINTS, 200), 10000), step=100
     )
 
-    st.plotly_chart(fig, use_container_width=True)
-
-    if selected_school != "전체":
-        df = env_data[selected_school]
-        target_ec = ec_map[selected_school]
-
+    # SQLite 백엔드는 전체 시계열을 읽지 않음: 기간 범위 / 행 수는 (school, time) 인덱스에서 바로 조회
+    from_db = ENV_BACKEND == "sqlite" and not env_data
+    if from_db:
+        base_level = None
+        _, t_min, t_max = query_environment_extent(selected_school, env_manifest)
+    else:
+        df = load_school_series(selected_school)
+        # 청크 모드의 시계열은 이미 1시간 구간 평균(+ 구간 최소 / 최대): 그보다 가는 단계는 없음
+        base_level = "1h" if f"{SENSOR_COLUMNS[0]}_min" in df else None
+        t_min, t_max = df["time"].min(), df["time"].max()
+
+    # 기간을 좁히면 그 구간만 잘라서 더 가는 해상도(최종적으로 원본)로 다시 그림
+    start, end = t_min, t_max
+    if t_min < t_max:
+        start, end = st.slider(
+            "기간",
+            min_value=t_min.to_pydatetime(),
+            max_value=t_max.to_pydatetime(),
+            value=(t_min.to_pydatetime(), t_max.to_pydatetime()),
+            step=timedelta(hours=1),
+            format="YYYY-MM-DD HH:mm",
+            key=f"window_{selected_school}"
+        )
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if from_db:
+        rows = query_environment_extent(selected_school, env_manifest, start, end)[0]
+    else:
+        window = window_slice(df, start, end)
+        rows = len(window)
+
+    level = base_level
+    if downsample != "lttb":
+        # 보이는 기간에 맞는 해상도 선택: 점 수는 max_points 이하로 유지
+        if from_db:
+            def level_rows(freq):
+                return len(query_environment_rollup(selected_school, env_manifest, freq, start.floor(freq), end))
+        else:
+            def level_rows(freq):
+                return len(window_slice(load_school_pyramid(selected_school, df)[freq], start.floor(freq), end))
+        picked = pick_pyramid_level(rows, level_rows, max_points)
+        if picked is not None and (base_level is None or pd.Timedelta(picked) > pd.Timedelta(base_level)):
+            level = picked
+    if level == base_level:
+        if from_db:
+            window = query_environment_series(selected_school, env_manifest, start, end)
+        view = window
+    elif from_db:
+        # 굵은 해상도는 구간 집계까지 SQLite 에서 계산해 집계된 행만 받음
+        view = query_environment_rollup(selected_school, env_manifest, level, start.floor(level), end)
+    else:
+        pyramid = load_school_pyramid(selected_school, df)[level]
+        view = window_slice(pyramid, start.floor(level), end)
+    target_ec = ec_map[selected_school]
+
+    def build_ts():
         fig_ts = make_subplots(
             rows=3, cols=1,
             shared_xaxes=True,
             subplot_titles=["온도 변화", "습도 변화", "EC 변화"]
         )
 
-        fig_ts.add_trace(
-            go.Scatter(x=df["time"], y=df["temperature"], mode="lines"),
-            row=1, col=1
-        )
-        fig_ts.add_trace(
-            go.Scatter(x=df["time"], y=df["humidity"], mode="lines"),
-            row=2, col=1
-        )
-        fig_ts.add_trace(
-            go.Scatter(x=df["time"], y=df["ec"], mode="lines"),
-            row=3, col=1
-        )
+        for row, column in enumerate(["temperature", "humidity", "ec"], start=1):
+            add_series_trace(
+                fig_ts, view, column, row,
+                banded=downsample != "lttb" and f"{column}_min" in view,
+                max_points=max_points if downsample == "lttb" else None
+            )
 
         fig_ts.add_hline(
             y=target_ec,
@@ -228,12 +354,130 @@ with tab2:
             annotation_text="목표 EC"
         )
 
-        fig_ts.update_layout(height=700, font=PLOTLY_FONT)
-        st.plotly_chart(fig_ts, use_container_width=True)
+        fig_ts.update_layout(height=700, font=PLOTLY_FONT, showlegend=False)
+        return fig_ts
+
+    st.plotly_chart(
+        cached_figure(
+            "ts", fingerprint,
+            (selected_school, downsample, max_points, render_mode, start, end),
+            build_ts
+        ),
+        use_container_width=True
+    )
+    if downsample == "lttb":
+        st.caption(
+            f"표시 해상도: LTTB (계열당 최대 {min(rows, max_points):,}점 / "
+            f"구간 {PYRAMID_LABELS[base_level]} {rows:,}점)"
+        )
+    else:
+        st.caption(
+            f"표시 해상도: {PYRAMID_LABELS[level]} ({len(view):,}점 / "
+            f"구간 {PYRAMID_LABELS[base_level]} {rows:,}점)"
+        )
+
+
+def render_environment():
+    st.subheader("학교별 환경 평균 비교")
+
+    avg_env = agg.xs("twmean", axis=1, level=1)[SENSOR_COLUMNS].dropna(how="all")
+
+    # 차트는 데이터셋 버전 + 입력값별로 캐시: 바뀐 차트만 다시 만듦
+    def build_env_bars():
+        fig = make_subplots(
+            rows=2, cols=2,
+            subplot_titles=[
+                "평균 온도", "평균 습도",
+                "평균 pH", "목표 EC vs 실측 EC"
+            ]
+        )
+
+        fig.add_bar(x=avg_env.index, y=avg_env["temperature"], row=1, col=1)
+        fig.add_bar(x=avg_env.index, y=avg_env["humidity"], row=1, col=2)
+        fig.add_bar(x=avg_env.index, y=avg_env["ph"], row=2, col=1)
+
+        fig.add_bar(
+            x=avg_env.index,
+            y=[ec_map.get(s) for s in avg_env.index],
+            name="목표 EC",
+            row=2, col=2
+        )
+        fig.add_bar(
+            x=avg_env.index,
+            y=avg_env["ec"],
+            name="실측 EC",
+            row=2, col=2
+        )
+
+        fig.update_layout(
+            height=650,
+            barmode="group",
+            font=PLOTLY_FONT
+        )
+        return fig
+
+    st.plotly_chart(
+        cached_figure("env_bars", fingerprint, (), build_env_bars),
+        use_container_width=True
+    )
+
+    # 공통 시간축: 격자 정렬 결과는 fingerprint + 간격별로 캐시되어 재실행 시 다시 맞추지 않음
+    if st.toggle("📈 학교별 시계열 겹쳐 보기 (공통 시간축)"):
+        g1, g2 = st.columns(2)
+        metric = g1.selectbox(
+            "항목", list(METRIC_LABELS), format_func=METRIC_LABELS.get
+        )
+        freq_labels = list(GRID_FREQS)
+        freq_label = g2.radio(
+            "시간 간격",
+            freq_labels,
+            index=list(GRID_FREQS.values()).index(ENV_GRID_FREQ) if ENV_GRID_FREQ in GRID_FREQS.values() else 1,
+            horizontal=True
+        )
+        grid = build_time_grid(
+            fingerprint,
+            GRID_FREQS[freq_label],
+            tuple(env_summary.index),
+            load_school_series
+        )
+
+        def build_overlay():
+            fig_overlay = go.Figure()
+            for s in grid[metric].columns:
+                fig_overlay.add_trace(
+                    scatter_trace(len(grid), x=grid.index, y=grid[metric][s], mode="lines", name=s)
+                )
+            fig_overlay.update_layout(
+                height=450,
+                yaxis_title=METRIC_LABELS[metric],
+                font=PLOTLY_FONT
+            )
+            return fig_overlay
+
+        st.plotly_chart(
+            cached_figure("overlay", fingerprint, (metric, freq_label, render_mode), build_overlay),
+            use_container_width=True
+        )
+
+        st.caption("학교 간 상관계수 (같은 시간 구간끼리 비교)")
+        st.dataframe(grid[metric].corr().round(2), use_container_width=True)
+
+    render_school_series()
 
     with st.expander("📥 환경 데이터 원본"):
-        st.dataframe(env_all, use_container_width=True)
-        csv = env_all.to_csv(index=False).encode("utf-8-sig")
+        if env_all is not None:
+            st.dataframe(env_all, use_container_width=True)
+            csv = env_all.to_csv(index=False).encode("utf-8-sig")
+        else:
+            # 지연 모드 / SQLite: 요약만 보여주고 전체 CSV 는 다운로드를 누를 때 생성
+            st.dataframe(avg_env, use_container_width=True)
+
+            def csv():
+                if ENV_BACKEND == "sqlite":
+                    return export_environment_csv()
+                env = load_environment_data(DATA_DIR, env_manifest)
+                return pd.concat(env.values(), ignore_index=True).to_csv(index=False).encode("utf-8-sig")
+
         st.download_button(
             "CSV 다운로드",
             data=csv,
@@ -244,91 +488,152 @@ with tab2:
 # ==================================================
 # Tab 3 : 생육 결과
 # ==================================================
-with tab3:
+def render_growth():
     st.subheader("🥇 EC별 평균 생중량")
 
     ec_avg = (
-        growth_all.groupby("EC")["생중량(g)"]
-        .mean()
+        ec_group_means(agg, ec_map, "생중량(g)")
+        .rename_axis("EC")
+        .rename("생중량(g)")
         .reset_index()
     )
 
-    fig_ec = px.bar(
-        ec_avg,
-        x="EC",
-        y="생중량(g)",
-        text_auto=".2f"
-    )
+    def build_ec_bar():
+        fig_ec = px.bar(
+            ec_avg,
+            x="EC",
+            y="생중량(g)",
+            text_auto=".2f"
+        )
 
-    fig_ec.update_traces(
-        marker_color=[
-            "gold" if ec == 2.0 else None
-            for ec in ec_avg["EC"]
-        ]
-    )
+        fig_ec.update_traces(
+            marker_color=[
+                "gold" if ec == 2.0 else "#636efa"
+                for ec in ec_avg["EC"]
+            ]
+        )
 
-    fig_ec.update_layout(font=PLOTLY_FONT)
-    st.plotly_chart(fig_ec, use_container_width=True)
-
-    fig2 = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=[
-            "평균 생중량",
-            "평균 잎 수",
-            "평균 지상부 길이",
-            "개체수"
-        ]
-    )
+        fig_ec.update_layout(font=PLOTLY_FONT)
+        return fig_ec
 
-    fig2.add_bar(
-        x=schools,
-        y=growth_all.groupby("school")["생중량(g)"].mean(),
-        row=1, col=1
-    )
-    fig2.add_bar(
-        x=schools,
-        y=growth_all.groupby("school")["잎 수(장)"].mean(),
-        row=1, col=2
+    st.plotly_chart(
+        cached_figure("ec_bar", fingerprint, (), build_ec_bar),
+        use_container_width=True
     )
-    fig2.add_bar(
-        x=schools,
-        y=growth_all.groupby("school")["지상부 길이(mm)"].mean(),
-        row=2, col=1
-    )
-    fig2.add_bar(
-        x=schools,
-        y=growth_all.groupby("school").size(),
-        row=2, col=2
+
+    def build_growth_bars():
+        fig2 = make_subplots(
+            rows=2, cols=2,
+            subplot_titles=[
+                "평균 생중량",
+                "평균 잎 수",
+                "평균 지상부 길이",
+                "개체수"
+            ]
+        )
+
+        fig2.add_bar(
+            x=schools,
+            y=agg.loc[schools, ("생중량(g)", "mean")],
+            row=1, col=1
+        )
+        fig2.add_bar(
+            x=schools,
+            y=agg.loc[schools, ("잎 수(장)", "mean")],
+            row=1, col=2
+        )
+        fig2.add_bar(
+            x=schools,
+            y=agg.loc[schools, ("지상부 길이(mm)", "mean")],
+            row=2, col=1
+        )
+        fig2.add_bar(
+            x=schools,
+            y=agg.loc[schools, (GROWTH_COUNT, "count")],
+            row=2, col=2
+        )
+
+        fig2.update_layout(height=650, font=PLOTLY_FONT)
+        return fig2
+
+    st.plotly_chart(
+        cached_figure("growth_bars", fingerprint, (), build_growth_bars),
+        use_container_width=True
     )
 
-    fig2.update_layout(height=650, font=PLOTLY_FONT)
-    st.plotly_chart(fig2, use_container_width=True)
+    def build_growth_box():
+        # 사분위수 / 울타리는 서버에서 계산: 개체 수가 늘어도 보내는 데이터 크기는 그대로
+        box_stats, outliers = build_box_stats(fingerprint, "생중량(g)", growth_all)
+        fig_box = go.Figure()
+        fig_box.add_trace(
+            go.Box(
+                x=box_stats.index,
+                q1=box_stats["q1"],
+                median=box_stats["median"],
+                q3=box_stats["q3"],
+                lowerfence=box_stats["lowerfence"],
+                upperfence=box_stats["upperfence"],
+                name="생중량(g)",
+                marker_color="#636efa"
+            )
+        )
+        fig_box.add_trace(
+            go.Scatter(
+                x=outliers["school"],
+                y=outliers["생중량(g)"],
+                mode="markers",
+                name="이상치",
+                marker_color="#636efa"
+            )
+        )
+        fig_box.update_layout(
+            xaxis_title="school",
+            yaxis_title="생중량(g)",
+            showlegend=False,
+            font=PLOTLY_FONT
+        )
+        return fig_box
 
-    fig_box = px.box(growth_all, x="school", y="생중량(g)")
-    fig_box.update_layout(font=PLOTLY_FONT)
-    st.plotly_chart(fig_box, use_container_width=True)
+    st.plotly_chart(
+        cached_figure("growth_box", fingerprint, (), build_growth_box),
+        use_container_width=True
+    )
 
     c1, c2 = st.columns(2)
 
     with c1:
-        fig_sc1 = px.scatter(
-            growth_all,
-            x="잎 수(장)",
-            y="생중량(g)",
-            color="school"
+        def build_scatter_leaves():
+            fig_sc1 = px.scatter(
+                growth_all,
+                x="잎 수(장)",
+                y="생중량(g)",
+                color="school",
+                render_mode="webgl" if use_webgl(len(growth_all), render_mode) else "svg"
+            )
+            fig_sc1.update_layout(font=PLOTLY_FONT)
+            return fig_sc1
+
+        st.plotly_chart(
+            cached_figure("scatter_leaves", fingerprint, (render_mode,), build_scatter_leaves),
+            use_container_width=True
         )
-        fig_sc1.update_layout(font=PLOTLY_FONT)
-        st.plotly_chart(fig_sc1, use_container_width=True)
 
     with c2:
-        fig_sc2 = px.scatter(
-            growth_all,
-            x="지상부 길이(mm)",
-            y="생중량(g)",
-            color="school"
+        def build_scatter_length():
+            fig_sc2 = px.scatter(
+                growth_all,
+                x="지상부 길이(mm)",
+                y="생중량(g)",
+                color="school",
+                render_mode="webgl" if use_webgl(len(growth_all), render_mode) else "svg"
+            )
+            fig_sc2.update_layout(font=PLOTLY_FONT)
+            return fig_sc2
+
+        st.plotly_chart(
+            cached_figure("scatter_length", fingerprint, (render_mode,), build_scatter_length),
+            use_container_width=True
         )
-        fig_sc2.update_layout(font=PLOTLY_FONT)
-        st.plotly_chart(fig_sc2, use_container_width=True)
 
     with st.expander("📥 생육 데이터 다운로드"):
         st.dataframe(growth_all, use_container_width=True)
@@ -341,3 +646,13 @@ with tab3:
             file_name="생육결과_전체.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
+
+
+for tab, render in (
+    (tab1, render_overview),
+    (tab2, render_environment),
+    (tab3, render_growth),
+):
+    if tab.open:
+        with tab:
+            render()
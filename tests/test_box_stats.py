@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+COLUMN = "생중량(g)"
+
+
+def plotly_interp(values, p):
+    # plotly.js Lib.interp (box 의 기본 quartilemethod="linear")
+    values = np.sort(values)
+    n = p * len(values) - 0.5
+    if n < 0:
+        return values[0]
+    if n > len(values) - 1:
+        return values[-1]
+    frac = n % 1
+    return frac * values[int(np.ceil(n))] + (1 - frac) * values[int(np.floor(n))]
+
+
+def plotly_box(values):
+    # plotly.js box calc: 사분위수 + 울타리 안쪽 가장 바깥 점
+    values = np.sort(values)
+    q1, median, q3 = (plotly_interp(values, p) for p in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    lowerfence = min(q1, inside.min())
+    upperfence = max(q3, inside.max())
+    outliers = values[(values < lowerfence) | (values > upperfence)]
+    return [q1, median, q3, lowerfence, upperfence], outliers
+
+
+@pytest.fixture(scope="module")
+def growth_all():
+    frames = data_loader.read_growth_workbook(DATA_DIR)
+    return data_loader.concat_by_school(list(frames.values()))
+
+
+def test_matches_plotly_quartiles(growth_all):
+    stats, outliers = data_loader.build_box_stats("test", COLUMN, growth_all)
+    for school, group in growth_all.groupby("school", observed=True):
+        expected, expected_outliers = plotly_box(group[COLUMN].dropna().to_numpy("float64"))
+        row = stats.loc[str(school), ["q1", "median", "q3", "lowerfence", "upperfence"]]
+        np.testing.assert_allclose(row.to_numpy("float64"), expected)
+        got = np.sort(outliers.loc[outliers["school"] == str(school), COLUMN].to_numpy("float64"))
+        np.testing.assert_allclose(got, expected_outliers)
+
+
+def test_bundled_values(growth_all):
+    stats, _ = data_loader.build_box_stats("test", COLUMN, growth_all)
+    assert stats.loc["하늘고", "q3"] == pytest.approx(4.0975)
+    assert stats.loc["동산고", ["q1", "q3"]].tolist() == pytest.approx([1.40, 4.00])
+
+
+def test_small_groups():
+    growth_all = pd.DataFrame({
+        "school": pd.Categorical(["a", "b", "b", "c", "c", "c"]),
+        COLUMN: [1.0, 2.0, 4.0, 1.0, 2.0, 10.0],
+    })
+    stats, _ = data_loader.build_box_stats("small", COLUMN, growth_all)
+    for school, group in growth_all.groupby("school", observed=True):
+        expected, _ = plotly_box(group[COLUMN].to_numpy())
+        np.testing.assert_allclose(stats.loc[school].to_numpy("float64"), expected)
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import data_loader
+
+SOURCE = Path(__file__).resolve().parent.parent / "data" / "송도고_환경데이터.csv"
+
+
+@pytest.fixture
+def log(tmp_path):
+    lines = SOURCE.read_bytes().split(b"\r\n")
+    path = tmp_path / "송도고_환경데이터.csv"
+    path.write_bytes(b"\r\n".join(lines[:200]))
+    data_loader._env_frames.clear()
+    data_loader._env_pyramids.clear()
+    return path, lines, tmp_path / "cache"
+
+
+def append(path, data):
+    with open(path, "ab") as fp:
+        fp.write(data)
+
+
+def check(path, cache_dir):
+    cached = data_loader.read_environment_csv(path, cache_dir)
+    expected = data_loader.parse_environment_csv(path)
+    pd.testing.assert_frame_equal(cached.reset_index(drop=True), expected)
+    summary = data_loader.read_environment_summary(path, cache_dir)
+    assert summary["rows"] == len(expected)
+    assert summary["ec"]["sum"] == pytest.approx(expected["ec"].astype("float64").sum())
+    # 시간 가중 평균은 캐시 이력과 관계없이 새로 파싱한 결과와 같아야 함
+    fresh = data_loader.summarize_frame(expected)
+    for c in data_loader.SENSOR_COLUMNS:
+        assert summary[c]["span"] == pytest.approx(fresh[c]["span"])
+        assert summary[c]["area"] == pytest.approx(fresh[c]["area"])
+    return cached
+
+
+def test_append_complete_lines(log):
+    path, lines, cache_dir = log
+    check(path, cache_dir)
+    append(path, b"\r\n" + b"\r\n".join(lines[200:300]))
+    check(path, cache_dir)
+    # 메모리의 프레임이 없어도 Parquet 조각에서 이어서 읽음
+    data_loader._env_frames.clear()
+    append(path, b"\r\n" + b"\r\n".join(lines[300:400]) + b"\r\n")
+    assert len(check(path, cache_dir)) == 399
+
+
+def test_append_partial_line_missing_columns(log):
+    path, lines, cache_dir = log
+    check(path, cache_dir)
+    line = lines[200]
+    # 쉼표 하나까지만 기록된 상태: 파싱은 실패하지 않고 그 줄만 미룸
+    append(path, b"\r\n" + line[:line.index(b",") + 3])
+    assert len(check(path, cache_dir)) == 199
+    append(path, line[line.index(b",") + 3:] + b"\r\n" + lines[201])
+    assert len(check(path, cache_dir)) == 201
+
+
+def test_append_partial_value_is_replaced(log):
+    path, lines, cache_dir = log
+    check(path, cache_dir)
+    line = lines[200]
+    # 마지막 값이 일부만 기록된 상태 ("0.528" 중 "0.")
+    cut = line.rindex(b",") + 2
+    append(path, b"\r\n" + line[:cut])
+    check(path, cache_dir)
+    append(path, line[cut:] + b"\r\n" + lines[201])
+    cached = check(path, cache_dir)
+    assert cached["ec"].iloc[199] == pytest.approx(float(line.rsplit(b",", 1)[1]))
+
+
+def test_out_of_order_rows_are_kept(log):
+    path, lines, cache_dir = log
+    check(path, cache_dir)
+    append(path, b"\r\n" + lines[150] + b"\r\n" + lines[201])
+    assert len(check(path, cache_dir)) == 201
+    # 완성된 줄 뒤에 이른 시각의 줄만 추가된 경우도 경계를 잇지 않고 다시 계산
+    append(path, b"\r\n" + lines[120] + b"\r\n")
+    assert len(check(path, cache_dir)) == 202
+
+
+def test_summary_does_not_keep_frames(log):
+    path, lines, cache_dir = log
+    # 지연 모드: 캐시가 없거나 파일이 자라도 요약만 계산하고 시계열은 메모리에 남기지 않음
+    assert data_loader.read_environment_summary(path, cache_dir)["rows"] == 199
+    append(path, b"\r\n" + b"\r\n".join(lines[200:300]))
+    assert data_loader.read_environment_summary(path, cache_dir)["rows"] == 299
+    assert not data_loader._env_frames
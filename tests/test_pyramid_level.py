@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import data_loader
+
+
+def gappy_series():
+    # 10분 간격 5일 + 100일 공백 + 10분 간격 5일
+    first = pd.date_range("2025-01-01", periods=720, freq="10min")
+    second = pd.date_range("2025-04-16", periods=720, freq="10min")
+    times = first.append(second)
+    values = np.linspace(0.0, 1.0, len(times), dtype="float32")
+    return pd.DataFrame({"time": times, **{c: values for c in data_loader.SENSOR_COLUMNS}})
+
+
+def level_counter(df, start, end):
+    pyramid = {freq: data_loader.rollup_series(rollup) for freq, rollup in data_loader.build_pyramid(df)["levels"].items()}
+    return lambda freq: len(data_loader.window_slice(pyramid[freq], start.floor(freq), end))
+
+
+def test_raw_rows_within_budget():
+    df = gappy_series()
+    start, end = df["time"].iloc[0], df["time"].iloc[-1]
+    assert data_loader.pick_pyramid_level(len(df), level_counter(df, start, end), 2000) is None
+
+
+def test_gaps_do_not_force_a_coarser_level():
+    df = gappy_series()
+    start, end = df["time"].iloc[0], df["time"].iloc[-1]
+    # 기간 / 간격으로는 15분 10,000점 이상이지만 실제로 행이 있는 15분 구간은 960개
+    assert data_loader.pick_pyramid_level(len(df), level_counter(df, start, end), 1000) == "15min"
+    assert data_loader.pick_pyramid_level(len(df), level_counter(df, start, end), 500) == "1h"
+    assert data_loader.pick_pyramid_level(len(df), level_counter(df, start, end), 100) == "1D"
@@ -0,0 +1,49 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import data_loader
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def row_counts(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        return dict(con.execute("SELECT school, COUNT(*) FROM env GROUP BY school"))
+    finally:
+        con.close()
+
+
+def test_concurrent_syncs_load_each_school_once(tmp_path):
+    db_path = tmp_path / "env.sqlite"
+    manifest = data_loader.data_manifest(DATA_DIR, ".csv")
+    data_loader._env_frames.clear()
+
+    with ThreadPoolExecutor(3) as pool:
+        list(pool.map(lambda _: data_loader.sync_environment_db(DATA_DIR, manifest, db_path), range(3)))
+
+    expected = {
+        data_loader.school_name(DATA_DIR / entry[0]): len(data_loader.parse_environment_csv(DATA_DIR / entry[0]))
+        for entry in manifest
+    }
+    assert row_counts(db_path) == expected
+    assert not data_loader._env_frames
+
+
+def test_sync_reloads_only_changed_schools(tmp_path):
+    db_path = tmp_path / "env.sqlite"
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    source = DATA_DIR / "송도고_환경데이터.csv"
+    lines = source.read_bytes().split(b"\r\n")
+    path = data_dir / source.name
+    path.write_bytes(b"\r\n".join(lines[:101]) + b"\r\n")
+
+    data_loader.sync_environment_db(data_dir, data_loader.data_manifest(data_dir, ".csv"), db_path)
+    assert row_counts(db_path) == {"송도고": 100}
+
+    with open(path, "ab") as fp:
+        fp.write(b"\r\n".join(lines[101:151]) + b"\r\n")
+    data_loader.sync_environment_db(data_dir, data_loader.data_manifest(data_dir, ".csv"), db_path)
+    assert row_counts(db_path) == {"송도고": 150}
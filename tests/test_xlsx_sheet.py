@@ -0,0 +1,37 @@
+import openpyxl
+import pandas as pd
+
+import data_loader
+
+
+def write_workbook(path, rows, formatted_row=None):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "학교"
+    for row in rows:
+        ws.append(row)
+    if formatted_row:
+        # 값 없이 서식만 있는 셀: 시트 크기가 이 행까지 늘어남
+        ws.cell(row=formatted_row, column=1).number_format = "0.00"
+    wb.save(path)
+
+
+def test_interior_blank_rows_are_kept(tmp_path):
+    xlsx = tmp_path / "growth.xlsx"
+    rows = [("개체번호", "생중량(g)"), (1, 2.5), (None, None), (3, 4.0)]
+    write_workbook(xlsx, rows)
+
+    got = data_loader.read_xlsx_sheets(xlsx)["학교"]
+    expected = pd.read_excel(xlsx, sheet_name="학교")
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+    assert got["생중량(g)"].tolist()[-1] == 4.0
+
+
+def test_trailing_formatted_rows_are_dropped(tmp_path):
+    xlsx = tmp_path / "growth.xlsx"
+    rows = [("개체번호", "생중량(g)"), (1, 2.5), (2, 3.0), (None, None)]
+    write_workbook(xlsx, rows, formatted_row=200)
+
+    got = data_loader.read_xlsx_sheets(xlsx)["학교"]
+    assert len(got) == 2
+    assert got["생중량(g)"].tolist() == [2.5, 3.0]